@@ -1,7 +1,62 @@
 from ruamel.yaml import YAML
 from ruamel.yaml.comments import CommentedMap
 from typing import Any, Dict, List, Tuple, Union
-import re
+import io
+import sys
+
+# Token kinds for parsed path_ordering dot-paths.
+_KEY = "key"
+_INDEX = "index"
+_ANY_KEY = "any_key"
+_ANY_INDEX = "any_index"
+
+# Leaf types produced by YAML/JSON loaders. Checking the exact type first lets
+# scalar values skip the isinstance() test for dict/list (and subclasses).
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _intern(value: Any) -> Any:
+    """
+    Intern `value` if it is a string, so equal keys share one object.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+class _PathTrieNode:
+    """
+    One level of the compiled path_ordering trie.
+
+    Edges are split by token kind so a path part can be checked with plain
+    dict lookups. `order` holds (rule index, key order) for rules ending here.
+    """
+
+    __slots__ = ("keys", "indices", "any_key", "any_index", "order")
+
+    def __init__(self):
+        self.keys: Dict[str, "_PathTrieNode"] = {}
+        self.indices: Dict[int, "_PathTrieNode"] = {}
+        self.any_key: Union["_PathTrieNode", None] = None
+        self.any_index: Union["_PathTrieNode", None] = None
+        self.order: Union[Tuple[int, List[str]], None] = None
+
+    def step(self, part: Any) -> List["_PathTrieNode"]:
+        """
+        Return the child nodes reachable by following `part` from this node.
+        """
+        children = []
+        if isinstance(part, int):
+            child = self.indices.get(part)
+            if child is not None:
+                children.append(child)
+            if self.any_index is not None:
+                children.append(self.any_index)
+        else:
+            child = self.keys.get(str(part))
+            if child is not None:
+                children.append(child)
+            if self.any_key is not None:
+                children.append(self.any_key)
+        return children
 
 
 class OrderedYAML:
@@ -31,16 +86,53 @@ class OrderedYAML:
                                             Example: {"outer.a[].b[*]": ["x", "y", "z"]}
         """
         self.data = data
-        self.yaml = YAML()
+        # Round-trip mode is required: the safe representer sorts mapping keys,
+        # cannot represent CommentedMap and renders None as "null". ruamel has
+        # no C emitter for round-trip output, so pure=False would change nothing.
+        self.yaml = YAML(typ="rt")
         self.yaml.default_flow_style = False
         self.key_ordering = {}
 
         if ordering_template:
-            self.key_ordering = self._extract_key_ordering(ordering_template)
-        if path_ordering:
-            self.path_ordering_patterns = self._build_path_patterns(path_ordering)
-        else:
-            self.path_ordering_patterns = []
+            self.key_ordering = {
+                tuple(map(_intern, path)): [_intern(key) for key in keys]
+                for path, keys in self._extract_key_ordering(ordering_template).items()
+            }
+        self._path_trie = self._build_path_trie(path_ordering or {})
+        self._trie_roots = [self._path_trie] if path_ordering else []
+
+        # Every prefix of a template path; subtrees outside these (and outside
+        # the path_ordering trie) have nothing to reorder and are only copied.
+        self._ordered_prefixes = {
+            path[:i] for path in self.key_ordering for i in range(len(path) + 1)
+        }
+
+    @property
+    def data(self) -> dict:
+        """
+        The raw data to render as YAML.
+
+        The ordered transform of the data and the YAML text rendered from it
+        are computed once and reused by dump()/dumps(). Assigning a new value
+        discards both; after mutating the data in place, or changing settings
+        on `self.yaml`, call invalidate().
+        """
+        return self._data
+
+    @data.setter
+    def data(self, value: dict):
+        self._data = value
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Discard the cached ordered transform and rendered YAML text.
+
+        Call this after mutating `data` in place or changing settings on
+        `self.yaml`, so the next dump()/dumps() picks up the change.
+        """
+        self._transformed = None
+        self._dump_cache = None
 
     def _extract_key_ordering(
         self, node: Any, path: Tuple = ()
@@ -57,87 +149,229 @@ class OrderedYAML:
             ordering.update(self._extract_key_ordering(node[0], path + (0,)))
         return ordering
 
-    def _build_path_patterns(
-        self, path_ordering: Dict[str, List[str]]
-    ) -> List[Tuple[re.Pattern, List[str]]]:
+    def _tokenize_path(self, dot_path: str) -> List[Tuple[str, Any]]:
         """
-        Convert dot-paths like 'a.b[].c' or 'a.*.c' into compiled regex patterns.
-
-        Returns:
-            List of tuples: (compiled regex pattern, key order)
+        Split a dot-path like 'a.b[].c' or 'a.*.c' into (kind, value) tokens.
         """
-        patterns = []
-        for dot_path, key_list in path_ordering.items():
-            # Escape special characters
-            regex_str = re.escape(dot_path)
+        invalid = ValueError(f"Invalid path_ordering path: {dot_path!r}")
+        tokens = []
+        if not dot_path:
+            # The empty path names the root mapping.
+            return tokens
+        for segment in dot_path.split("."):
+            # A segment is an optional key name followed by zero or more
+            # bracketed list indexes: name[0][*]...
+            name, bracket, rest = segment.partition("[")
+            if not segment or "]" in name:
+                raise invalid
+            if name == "*":
+                tokens.append((_ANY_KEY, None))
+            elif name:
+                tokens.append((_KEY, name))
 
-            # Handle list wildcards: [] or [*]
-            regex_str = regex_str.replace(r"\[\]", r"\[\d+\]")
-            regex_str = regex_str.replace(r"\[\*\]", r"\[\d+\]")
+            while bracket:
+                index, closed, rest = rest.partition("]")
+                if not closed or "[" in index:
+                    raise invalid
+                if index in ("", "*"):
+                    tokens.append((_ANY_INDEX, None))
+                elif index.isdigit():
+                    tokens.append((_INDEX, int(index)))
+                else:
+                    raise invalid
+                if rest and not rest.startswith("["):
+                    raise invalid
+                bracket, rest = rest[:1], rest[1:]
+        return tokens
 
-            # Handle dict wildcards: .*
-            regex_str = regex_str.replace(r"\.\*", r"\.[^.\[\]]+")
+    def _build_path_trie(self, path_ordering: Dict[str, List[str]]) -> _PathTrieNode:
+        """
+        Compile dot-paths into a token trie walked directly with tuple paths.
 
-            # Final pattern
-            pattern = re.compile(f"^{regex_str}$")
-            patterns.append((pattern, key_list))
-        return patterns
+        Returns:
+            _PathTrieNode: The root node of the trie.
+        """
+        root = _PathTrieNode()
+        for rule_index, (dot_path, key_list) in enumerate(path_ordering.items()):
+            node = root
+            for kind, value in self._tokenize_path(dot_path):
+                if kind == _KEY:
+                    node = node.keys.setdefault(_intern(value), _PathTrieNode())
+                elif kind == _INDEX:
+                    node = node.indices.setdefault(value, _PathTrieNode())
+                elif kind == _ANY_KEY:
+                    if node.any_key is None:
+                        node.any_key = _PathTrieNode()
+                    node = node.any_key
+                else:
+                    if node.any_index is None:
+                        node.any_index = _PathTrieNode()
+                    node = node.any_index
+            if node.order is None:
+                node.order = (rule_index, key_list)
+        return root
 
-    def _path_to_dotted(self, path: Tuple) -> str:
+    def _trie_nodes(self, path: Tuple) -> List[_PathTrieNode]:
         """
-        Convert tuple path like ('a', 'b', 0, 'c') to dot notation: 'a.b[0].c'
+        Return the trie nodes reached by `path`; empty if no path_ordering rule
+        can match the path or anything below it.
         """
-        dotted = []
+        nodes = self._trie_roots
         for part in path:
-            if isinstance(part, int):
-                dotted[-1] += f"[{part}]"
-            else:
-                dotted.append(str(part))
-        return ".".join(dotted)
+            if not nodes:
+                break
+            nodes = [child for node in nodes for child in node.step(part)]
+        return nodes
+
+    def _match_order(
+        self, path: Tuple, nodes: List[_PathTrieNode] = None
+    ) -> Union[List[str], None]:
+        """
+        Return key ordering list if a path_ordering rule matches the path.
+
+        When several rules match, the one declared first wins. `nodes` may be
+        passed when the trie nodes for `path` are already known.
+        """
+        if nodes is None:
+            nodes = self._trie_nodes(path)
+        if len(nodes) == 1:
+            if nodes[0].order is not None:
+                return nodes[0].order[1]
+        elif nodes:
+            matches = [node.order for node in nodes if node.order is not None]
+            if matches:
+                return min(matches, key=lambda order: order[0])[1]
+
+        # Hashing a tuple path walks all of its items, so skip the lookup
+        # entirely when there is no template ordering to consult.
+        if self.key_ordering:
+            return self.key_ordering.get(path)
+        return None
 
-    def _match_order(self, path: Tuple) -> Union[List[str], None]:
+    def _ordered_keys(
+        self, node: dict, path: Tuple, nodes: List[_PathTrieNode] = None
+    ) -> List:
         """
-        Return key ordering list if a regex pattern matches the path.
+        Return the keys of `node` in output order: keys named by the ordering
+        rule for `path` first, followed by any remaining keys in their
+        original order.
         """
-        dotted_path = self._path_to_dotted(path)
-        for pattern, key_list in self.path_ordering_patterns:
-            if pattern.match(dotted_path):
-                return key_list
-        return self.key_ordering.get(path)
+        desired_order = self._match_order(path, nodes)
+        if not desired_order:
+            return list(node)
+        # Merging `node` into a dict seeded with the rule's keys appends the
+        # remaining keys in one C-level pass; keys already present (including
+        # duplicates in the rule) keep their first position.
+        keys = dict.fromkeys([key for key in desired_order if key in node])
+        keys.update(node)
+        return list(keys)
 
     def _to_ordered_commented_map(
         self, node: Any, path: Tuple = ()
     ) -> Union[CommentedMap, List, Any]:
         """
-        Recursively convert data to a CommentedMap with ordered keys.
+        Convert data to a CommentedMap with ordered keys.
+
+        Walks the tree with an explicit stack rather than recursion, so the
+        transform itself does not hit the interpreter's recursion limit on
+        deeply nested input. (ruamel's representer still recurses, so dumping
+        very deep data can raise RecursionError.) Each frame is
+        (parent container, key or index in parent, node, path, trie nodes);
+        a child's trie nodes are stepped from its parent's, so matching costs
+        one step per node instead of a walk from the root.
+
+        Every dict and list is still copied, so dict subclasses come out as
+        plain mappings and shared references never become YAML anchors. Frames
+        for subtrees that no ordering rule can reach carry a path of None and
+        skip the matching work; scalars never get a frame of their own.
         """
-        if isinstance(node, dict):
-            ordered = CommentedMap()
-            keys = self._match_order(path) or list(node.keys())
-            for key in keys:
-                if key in node:
-                    ordered[key] = self._to_ordered_commented_map(
-                        node[key], path + (key,)
-                    )
-            return ordered
-
-        elif isinstance(node, list):
-            return [
-                self._to_ordered_commented_map(item, path + (i,))
-                for i, item in enumerate(node)
-            ]
+        ordered_keys = self._ordered_keys
+        ordered_prefixes = self._ordered_prefixes
+        # Prefix lookups hash the whole tuple path, so they are skipped when
+        # there is no template.
+        has_template = bool(ordered_prefixes)
+        containers = (dict, list)
+        scalar_types = _SCALAR_TYPES
+        unreached = ()
+        root = [node]
+        stack = []
+        pop = stack.pop
+        append = stack.append
 
-        else:
-            return node
+        if isinstance(node, containers):
+            root_nodes = self._trie_nodes(path)
+            if not root_nodes and not (has_template and path in ordered_prefixes):
+                path = None
+            append((root, 0, node, path, root_nodes))
+
+        # Children are copied into their new container straight away, which
+        # fixes their position; nested containers then get a frame of their
+        # own, which overwrites the placeholder with the converted copy.
+        while stack:
+            parent, slot, node, path, nodes = pop()
+            t = type(node)
+            if t is dict or (t is not list and isinstance(node, dict)):
+                ordered = CommentedMap()
+                keys = list(node) if path is None else ordered_keys(node, path, nodes)
+                for key in keys:
+                    value = ordered[key] = node[key]
+                    t = type(value)
+                    if t in scalar_types or not isinstance(value, containers):
+                        continue
+                    if path is None:
+                        append((ordered, key, value, None, unreached))
+                        continue
+                    child_path = path + (key,)
+                    child_nodes = [c for n in nodes for c in n.step(key)]
+                    if not child_nodes and not (
+                        has_template and child_path in ordered_prefixes
+                    ):
+                        child_path = None
+                    append((ordered, key, value, child_path, child_nodes))
+            else:
+                ordered = list(node)
+                for i, value in enumerate(ordered):
+                    t = type(value)
+                    if t in scalar_types or not isinstance(value, containers):
+                        continue
+                    if path is None:
+                        append((ordered, i, value, None, unreached))
+                        continue
+                    child_path = path + (i,)
+                    child_nodes = [c for n in nodes for c in n.step(i)]
+                    if not child_nodes and not (
+                        has_template and child_path in ordered_prefixes
+                    ):
+                        child_path = None
+                    append((ordered, i, value, child_path, child_nodes))
+            parent[slot] = ordered
+
+        return root[0]
+
+    def _get_transformed(self) -> Union[CommentedMap, List, Any]:
+        """
+        Return the ordered form of `self.data`, building it on first use.
+        """
+        if self._transformed is None:
+            self._transformed = self._to_ordered_commented_map(self.data)
+        return self._transformed
 
     def dump(self, fp):
         """
         Write YAML output to a file-like object.
 
+        Writes the same cached text as dumps(). Like ruamel, streams without
+        an `encoding` attribute (e.g. files opened in binary mode) receive it
+        encoded with `self.yaml.encoding` (utf-8 by default).
+
         Args:
             fp: File-like object with .write().
         """
-        self.yaml.dump(self._to_ordered_commented_map(self.data), fp)
+        text = self.dumps()
+        if hasattr(fp, "encoding"):
+            fp.write(text)
+        else:
+            fp.write(text.encode(self.yaml.encoding or "utf-8"))
 
     def dumps(self) -> str:
         """
@@ -146,8 +380,8 @@ class OrderedYAML:
         Returns:
             str: YAML-formatted string with ordered keys.
         """
-        from io import StringIO
-
-        stream = StringIO()
-        self.dump(stream)
-        return stream.getvalue()
+        if self._dump_cache is None:
+            stream = io.StringIO()
+            self.yaml.dump(self._get_transformed(), stream)
+            self._dump_cache = stream.getvalue()
+        return self._dump_cache
@@ -0,0 +1,172 @@
+import io
+import sys
+from collections import OrderedDict, defaultdict
+
+import pytest
+
+from orderedYAML import OrderedYAML
+
+
+def tokenize(dot_path):
+    return OrderedYAML({})._tokenize_path(dot_path)
+
+
+@pytest.mark.parametrize(
+    "dot_path, expected",
+    [
+        ("", []),
+        ("a", [("key", "a")]),
+        ("a.b", [("key", "a"), ("key", "b")]),
+        ("*", [("any_key", None)]),
+        ("*.m", [("any_key", None), ("key", "m")]),
+        ("a.*", [("key", "a"), ("any_key", None)]),
+        ("a[]", [("key", "a"), ("any_index", None)]),
+        ("a[*]", [("key", "a"), ("any_index", None)]),
+        ("a[0][2]", [("key", "a"), ("index", 0), ("index", 2)]),
+        ("[]", [("any_index", None)]),
+        (
+            "a[*].b[3].*",
+            [
+                ("key", "a"),
+                ("any_index", None),
+                ("key", "b"),
+                ("index", 3),
+                ("any_key", None),
+            ],
+        ),
+    ],
+)
+def test_tokenize_path(dot_path, expected):
+    assert tokenize(dot_path) == expected
+
+
+@pytest.mark.parametrize(
+    "dot_path",
+    ["a..b", "a.", ".a", "a..", "a[", "a]", "a[b]", "a[ 1]", "a[0]b", "a[[0]]"],
+)
+def test_tokenize_path_invalid(dot_path):
+    with pytest.raises(ValueError):
+        tokenize(dot_path)
+
+
+def test_invalid_path_ordering_raises():
+    with pytest.raises(ValueError):
+        OrderedYAML({"a": {"d": 1, "c": 2}}, path_ordering={"a..": ["c"]})
+
+
+def sample_data():
+    shared = {"k": [1]}
+    return {
+        "a": None,
+        "o": OrderedDict([("b", 1), ("a", 2)]),
+        "dd": defaultdict(list, {"z": [shared, shared]}),
+        "s": shared,
+        "l": [None],
+    }
+
+
+SAMPLE_YAML = """\
+a:
+o:
+  b: 1
+  a: 2
+dd:
+  z:
+  - k:
+    - 1
+  - k:
+    - 1
+s:
+  k:
+  - 1
+l:
+- 
+"""
+
+
+def test_dumps_with_unreached_rules():
+    oy = OrderedYAML(sample_data(), path_ordering={"missing": ["x"]})
+    assert oy.dumps() == SAMPLE_YAML
+
+
+def test_dumps_with_reached_rules():
+    oy = OrderedYAML(sample_data(), path_ordering={"o": ["a"], "dd.z[]": ["k"]})
+    assert oy.dumps() == SAMPLE_YAML.replace("  b: 1\n  a: 2\n", "  a: 2\n  b: 1\n")
+
+
+def test_yaml_settings_apply_before_first_dump():
+    oy = OrderedYAML({"a": {"b": [1, 2]}}, path_ordering={"a": ["b"]})
+    oy.yaml.default_flow_style = True
+    assert oy.dumps() == "{a: {b: [1, 2]}}\n"
+
+
+def test_dumps_without_rules():
+    assert OrderedYAML(sample_data()).dumps() == SAMPLE_YAML
+
+
+def test_yaml_settings_apply_without_rules():
+    oy = OrderedYAML({"a": {"b": [1, 2]}})
+    oy.yaml.default_flow_style = True
+    assert oy.dumps() == "{a: {b: [1, 2]}}\n"
+
+
+def test_dumps_returns_cached_text():
+    oy = OrderedYAML({"b": 1, "a": 2}, path_ordering={"": ["a"]})
+    first = oy.dumps()
+    assert first == "a: 2\nb: 1\n"
+    oy.yaml.indent(mapping=4)
+    assert oy.dumps() is first
+
+
+def test_assigning_data_clears_caches():
+    oy = OrderedYAML({"b": 1, "a": 2}, path_ordering={"": ["a"]})
+    oy.dumps()
+    oy.data = {"c": {"e": 1, "d": 2}}
+    assert oy._transformed is None
+    assert oy._dump_cache is None
+    assert oy.dumps() == "c:\n  e: 1\n  d: 2\n"
+
+
+def test_dump_matches_dumps_for_text_and_binary_streams():
+    oy = OrderedYAML({"b": "\u00e9", "a": [1, 2]}, path_ordering={"": ["a"]})
+    text = oy.dumps()
+    oy.yaml.indent(mapping=4)
+
+    text_stream = io.StringIO()
+    oy.dump(text_stream)
+    assert text_stream.getvalue() == text
+
+    binary_stream = io.BytesIO()
+    oy.dump(binary_stream)
+    assert binary_stream.getvalue() == text.encode("utf-8")
+
+
+def test_invalidate_picks_up_in_place_and_yaml_changes():
+    data = {"a": {"b": 1}}
+    oy = OrderedYAML(data, path_ordering={"a": ["b"]})
+    assert oy.dumps() == "a:\n  b: 1\n"
+
+    data["a"]["c"] = 2
+    oy.yaml.indent(mapping=4)
+    assert oy.dumps() == "a:\n  b: 1\n"
+
+    oy.invalidate()
+    assert oy.dumps() == "a:\n    b: 1\n    c: 2\n"
+
+
+def test_transform_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() + 100
+    data = node = {}
+    for _ in range(depth):
+        node["n"] = [{"b": 1, "a": 2}]
+        node = node["n"][0]
+
+    result = OrderedYAML(data, path_ordering={"n[]": ["a"]})._get_transformed()
+    assert list(result["n"][0]) == ["a", "b", "n"]
+
+    levels = 0
+    while "n" in result:
+        result = result["n"][0]
+        levels += 1
+    assert levels == depth
+    assert list(result) == ["b", "a"]